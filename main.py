@@ -3,9 +3,7 @@
 import os
 from solvis_sc3_modbus.log_config import setup_logging
 from solvis_sc3_modbus.client import SolvisSC3ModbusClient
-
-logger = setup_logging("SolvisSC3")
-
+from solvis_sc3_modbus.server import SnapshotServer
 
 # Use environment variables for host and port configuration
 host = os.getenv('SOLVIS_HOST', 'localhost')
@@ -13,11 +11,24 @@ port = int(os.getenv('SOLVIS_PORT', 502))
 unit_id = int(os.getenv('SOLVIS_UNIT_ID', 101))
 register_address = int(os.getenv('SOLVIS_REG_ADDRESS', -1))
 register_name = os.getenv('SOLVIS_REG_NAME')
+http_port = int(os.getenv('SOLVIS_HTTP_PORT', -1))
+http_host = os.getenv('SOLVIS_HTTP_HOST', '127.0.0.1')
+poll_interval = float(os.getenv('SOLVIS_POLL_INTERVAL', 10.0))
+log_json = os.getenv('SOLVIS_LOG_JSON', '').lower() in ('1', 'true', 'yes')
+
+logger = setup_logging("SolvisSC3", json_output=log_json)
 
 
 def main():
     solvis_client = SolvisSC3ModbusClient(host=host, port=port, unit_id=unit_id, debug=False)
-    if solvis_client.connect():
+    if http_port != -1:
+        server = SnapshotServer(solvis_client, host=http_host, port=http_port, interval=poll_interval)
+        logger.info("Serving snapshots on http://%s:%s/snapshot", http_host, http_port)
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+    elif solvis_client.connect():
         if register_address != -1:
             data = solvis_client.fetch_data(register_address=register_address, length=1)
         elif register_name is None:
@@ -26,7 +37,7 @@ def main():
             data = solvis_client.get(register_name)
         else:
             raise Exception("No register_name or register_address specified.")
-        logger.info(f"Data from registers: {data}")
+        logger.info("Data from registers: %s", data)
     else:
         logger.error("Connection to Solvis SC3 device failed.")
 
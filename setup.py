@@ -5,7 +5,7 @@ setup(
     version='0.1.0',
     packages=find_packages(),
     install_requires=[
-        "pyModbusTCP"
+        "pyModbusTCP>=0.3.0,<0.4"
     ],
     python_requires='>=3.7',
     license='Apache License',
@@ -1,16 +1,81 @@
+import logging
+import socket
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
 from pyModbusTCP.client import ModbusClient
+from pyModbusTCP.constants import MB_EXCEPT_ERR
+
+from solvis_sc3_modbus.log_config import RateLimitFilter
+from solvis_sc3_modbus.registers import ReadInputRegistersEnum, Unit
+
+logger = logging.getLogger(__name__)
+# A failing register is polled over and over; report it once per minute instead of on every cycle.
+logger.addFilter(RateLimitFilter(interval=60.0))
+
+# Largest number of holding registers a single Modbus read may request.
+MAX_BLOCK_LENGTH = 125
+# Smallest socket timeout used for a block read; a zero timeout would put the socket in non-blocking mode.
+MIN_BLOCK_TIMEOUT = 0.001
+
+
+class RegisterStatus(Enum):
+    FRESH = "fresh"  # Read during this call
+    STALE = "stale"  # Served from the cache of an earlier call
+    MISSING = "missing"  # Never read successfully
+
 
-from solvis_sc3_modbus.log_config import setup_logging
-from solvis_sc3_modbus.registers import ReadInputRegistersEnum
+@dataclass
+class RegisterReading:
+    name: str
+    value: Optional[Any]
+    unit: Optional[str]
+    status: RegisterStatus
+    age: Optional[float] = None  # Seconds since the raw value was read
+    error: Optional[str] = None  # Set when the raw value could not be decoded
 
-logger = setup_logging("SolvisSC3ModbusClient")
+
+def plan_blocks(addresses: Iterable[int], max_gap: int = 0, max_length: int = MAX_BLOCK_LENGTH) -> List[Tuple[int, int]]:
+    """
+    Group register addresses into as few block reads as possible.
+
+    Args:
+        addresses (iterable of int): Register addresses to cover. Duplicates are allowed.
+        max_gap (int): Number of unused addresses a block may span to join two neighbouring addresses.
+        max_length (int): Maximum number of registers per block.
+
+    Returns:
+        list of (int, int): (start address, length) tuples in ascending address order.
+    """
+    blocks = []
+    for address in sorted(set(addresses)):
+        if blocks:
+            start, length = blocks[-1]
+            end = start + length
+            if address - end <= max_gap and address - start < max_length:
+                blocks[-1] = (start, address - start + 1)
+                continue
+        blocks.append((address, 1))
+    return blocks
+
+
+def _unit_symbol(unit) -> Optional[str]:
+    return str(unit) if isinstance(unit, Unit) else None
 
 
 class SolvisSC3ModbusClient(object):
     def __init__(self, host, port, unit_id=1, debug=False):
         self.host = host
         self.port = port
-        self.client = ModbusClient(host=self.host, port=self.port, unit_id=unit_id, debug=debug, auto_open=True)
+        self.client = ModbusClient(host=self.host, port=self.port, unit_id=unit_id, auto_open=True)
+        if debug:
+            # pyModbusTCP reports frames through its logger instead of a debug flag
+            logging.getLogger('pyModbusTCP.client').setLevel(logging.DEBUG)
+        # Last raw value and monotonic read time per address, used to fill in stale values
+        self._cache: Dict[int, Tuple[int, float]] = {}
 
     def __getattr__(self, attr):
         if attr.startswith("get_"):
@@ -58,12 +123,166 @@ class SolvisSC3ModbusClient(object):
         try:
             data = self.client.read_holding_registers(register_address, length)
             if data is None:
-                logger.warning(f"Failed to fetch data from register {register_address}.")
+                logger.warning("Failed to fetch data from register %s.", register_address,
+                               extra={'register': register_address})
                 return None
             else:
-                logger.debug(f"Data fetched from register {register_address}: {data}")
+                logger.debug("Data fetched from register %s: %s", register_address, data)
                 # Simplify return statement
                 return data[0] if length == 1 else data
         except Exception as e:
-            logger.error(f"Exception while fetching data: {e}")
+            logger.error("Exception while fetching data from register %s: %s", register_address, e,
+                         extra={'register': register_address})
             return None
+
+    def get_many(self, register_names: Iterable[str], deadline: Optional[float] = None, max_gap: int = 0,
+                 retries: int = 1, min_attempt_time: float = 0.05) -> Dict[str, RegisterReading]:
+        """
+        Read several registers within a total time budget.
+
+        The registers are read in as few blocks as possible. Each block gets an equal share of the remaining
+        budget as its timeout, so time left over by fast reads goes to the remaining ones. A failed block is
+        split in half and a failed single register is retried, but only while time remains. Only Modbus
+        exception responses lead to a split or retry; a connection failure or timeout ends the cycle. Registers
+        that could not be read are served from the last successful read if there was one.
+
+        Reconnects are bounded by a block's share of the budget. Its timeout applies to each socket operation
+        though, so a device that trickles a reply byte by byte can still overrun the share.
+
+        Args:
+            register_names (iterable of str): Names of ``ReadInputRegistersEnum`` members.
+            deadline (float): Total time budget in seconds, or None for no limit.
+            max_gap (int): Number of unused addresses a block read may span, see ``plan_blocks``.
+            retries (int): How often a single failing register is retried.
+            min_attempt_time (float): Don't start another read when less than this many seconds remain.
+
+        Returns:
+            dict: A RegisterReading per register name, in the order requested.
+        """
+        try:
+            registers = [ReadInputRegistersEnum[name] for name in register_names]
+        except KeyError as e:
+            raise AttributeError(f"No matching enum member found for {e.args[0]}")
+
+        raw = self._read_blocks([register.address for register in registers], deadline, max_gap, retries,
+                                min_attempt_time)
+
+        now = time.monotonic()
+        for address, value in raw.items():
+            self._cache[address] = (value, now)
+
+        readings = {}
+        for register in registers:
+            if register.address in raw:
+                status, raw_value, age = RegisterStatus.FRESH, raw[register.address], 0.0
+            elif register.address in self._cache:
+                raw_value, read_at = self._cache[register.address]
+                status, age = RegisterStatus.STALE, now - read_at
+            else:
+                readings[register.name] = RegisterReading(register.name, None, _unit_symbol(register.unit),
+                                                          RegisterStatus.MISSING)
+                continue
+
+            value, error = None, None
+            try:
+                register.value = raw_value
+                value = register.value
+            except (ValueError, TypeError) as e:
+                error = str(e)
+            readings[register.name] = RegisterReading(register.name, value, _unit_symbol(register.unit), status,
+                                                      age, error)
+        return readings
+
+    def get_snapshot(self, deadline: Optional[float] = None, **kwargs) -> Dict[str, RegisterReading]:
+        """
+        Read all known registers within a total time budget.
+
+        Accepts the same keyword arguments as ``get_many``.
+        """
+        return self.get_many([register.name for register in ReadInputRegistersEnum], deadline=deadline, **kwargs)
+
+    def _read_blocks(self, addresses: List[int], deadline: Optional[float], max_gap: int, retries: int,
+                     min_attempt_time: float) -> Dict[int, int]:
+        end = None if deadline is None else time.monotonic() + deadline
+        pending = deque((block, 0) for block in plan_blocks(addresses, max_gap))
+        raw = {}
+
+        while pending:
+            (address, length), attempt = pending.popleft()
+            timeout = None
+            if end is not None:
+                remaining = end - time.monotonic()
+                if remaining < min_attempt_time:
+                    logger.debug("Deadline reached with %s block reads pending.", len(pending) + 1)
+                    break
+                timeout = remaining / (len(pending) + 1)
+
+            data, exception_response = self._read_block(address, length, timeout)
+            if data is not None:
+                raw.update(zip(range(address, address + length), data))
+            elif not exception_response:
+                # Network trouble affects every block alike; retrying them would only use up the budget
+                logger.debug("Giving up %s block reads after a connection failure.", len(pending))
+                break
+            elif length > 1:
+                half = length // 2
+                pending.appendleft(((address + half, length - half), attempt))
+                pending.appendleft(((address, half), attempt))
+            elif attempt < retries:
+                # Retry after the other blocks so they get their share of the budget first
+                pending.append(((address, length), attempt + 1))
+        return raw
+
+    def _read_block(self, register_address: int, length: int,
+                    timeout: Optional[float]) -> Tuple[Optional[List[int]], bool]:
+        """
+        Read one block, limiting connect and socket operations to ``timeout`` seconds if given.
+
+        Returns:
+            tuple: The register values or None, and whether a failure was a Modbus exception response.
+        """
+        # The timeout is applied to the socket directly: assigning ModbusClient.timeout closes the connection,
+        # which would cost a reconnect per block.
+        sock_timeout = None if timeout is None else max(timeout, MIN_BLOCK_TIMEOUT)
+        if not self.client.is_open and not self._connect_within(sock_timeout):
+            return None, False
+
+        sock = self._socket()
+        try:
+            if sock_timeout is not None:
+                sock.settimeout(sock_timeout)
+            data = self.client.read_holding_registers(register_address, length)
+            if data is None or len(data) != length:
+                logger.warning("Failed to fetch %s registers from register %s.", length, register_address,
+                               extra={'register': register_address})
+                return None, self.client.last_error == MB_EXCEPT_ERR
+            return data, False
+        except Exception as e:
+            logger.error("Exception while fetching data from register %s: %s", register_address, e,
+                         extra={'register': register_address})
+            return None, False
+        finally:
+            if sock_timeout is not None and self.client.is_open:
+                self._socket().settimeout(self.client.timeout)
+
+    def _connect_within(self, timeout: Optional[float]) -> bool:
+        # ModbusClient.open() always waits for the client's full timeout, so a bounded connect opens the
+        # socket itself and hands it over.
+        if timeout is None:
+            return self.connect()
+        self._socket()
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=timeout)
+        except OSError as e:
+            logger.error("Failed to connect to Solvis SC3 device: %s", e)
+            return False
+        self.client._sock = sock
+        logger.info("Connected to Solvis SC3 device.")
+        return True
+
+    def _socket(self) -> socket.socket:
+        # pyModbusTCP keeps its socket private; fail loudly instead of treating every block as failed.
+        try:
+            return self.client._sock
+        except AttributeError:
+            raise RuntimeError("Unsupported pyModbusTCP version: ModbusClient has no '_sock' attribute") from None
@@ -1,11 +1,164 @@
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import queue
+import threading
+import time
 
 LOGGING_FORMAT_DEFAULT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 
+# Attributes every LogRecord carries; anything else was passed via ``extra=`` and ends up in the JSON output.
+_RESERVED_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
 
-def setup_logging(name=__name__, level=logging.INFO, format=None):
-    if format is None:
-        format = LOGGING_FORMAT_DEFAULT
-    logging.basicConfig(level=level, format=format)
-    logger = logging.getLogger(name)
-    return logger
+_listener = None
+_queue_handler = None
+_listener_lock = threading.Lock()
+_exception_formatter = logging.Formatter()
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format log records as single-line JSON objects.
+
+    Fields passed via ``extra=`` (e.g. ``register``) are included as top-level keys.
+    """
+
+    def format(self, record):
+        payload = {
+            'time': self.formatTime(record, self.datefmt),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_RECORD_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload['exc_info'] = record.exc_text
+        if record.stack_info:
+            payload['stack_info'] = record.stack_info
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    """Plain text formatter that mentions how many duplicates a ``RateLimitFilter`` dropped."""
+
+    def formatMessage(self, record):
+        message = super().formatMessage(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            message += f" ({suppressed} similar messages suppressed)"
+        return message
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that keeps the traceback apart from the message.
+
+    The stock ``prepare`` merges the traceback into ``msg``, so the listener's formatter could no longer
+    tell them apart. Here the traceback is rendered to ``exc_text`` in the calling thread instead.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Drop repeated records of the same message and arguments within ``interval`` seconds.
+
+    Only records at or above ``level`` are considered, so the filter costs nothing on the debug path.
+    The first record emitted after a quiet period carries the number of dropped duplicates in its
+    ``suppressed`` attribute.
+    """
+
+    def __init__(self, interval=60.0, level=logging.WARNING):
+        super().__init__()
+        self.interval = interval
+        self.level = level
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno < self.level:
+            return True
+
+        key = (record.name, record.levelno, record.msg, repr(record.args))
+        now = time.monotonic()
+        with self._lock:
+            last, suppressed = self._seen.get(key, (None, 0))
+            if last is not None and now - last < self.interval:
+                self._seen[key] = (last, suppressed + 1)
+                return False
+            if last is None:
+                # Messages with changing arguments (e.g. exception texts) would otherwise pile up forever
+                self._seen = {seen_key: entry for seen_key, entry in self._seen.items()
+                              if now - entry[0] < self.interval}
+            self._seen[key] = (now, 0)
+
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+def setup_logging(name=__name__, level=logging.INFO, format=None, json_output=False):
+    """
+    Configure the root logger to hand records to a background thread and return the named logger.
+
+    Records are put on a queue in the calling thread; a ``QueueListener`` writes them to stderr, so slow
+    output never blocks the caller. Only the first call installs the handlers, later calls just adjust
+    the level. Meant to be called by applications; library modules should use ``logging.getLogger``.
+
+    Args:
+        name (str): Name of the logger to return.
+        level (int): Level for the root logger.
+        format (str): Format string for plain text output. Ignored when ``json_output`` is set.
+        json_output (bool): Emit one JSON object per line instead of plain text.
+
+    Returns:
+        logging.Logger: The requested logger.
+    """
+    global _listener, _queue_handler
+
+    root = logging.getLogger()
+    with _listener_lock:
+        if _listener is None:
+            if json_output:
+                formatter = JsonFormatter()
+            else:
+                formatter = TextFormatter(format or LOGGING_FORMAT_DEFAULT)
+            stream_handler = logging.StreamHandler()
+            stream_handler.setFormatter(formatter)
+
+            log_queue = queue.SimpleQueue()
+            _queue_handler = _QueueHandler(log_queue)
+            root.addHandler(_queue_handler)
+            _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+            _listener.start()
+            atexit.register(stop_logging)
+    root.setLevel(level)
+    return logging.getLogger(name)
+
+
+def stop_logging():
+    """Flush pending records and stop the background listener installed by ``setup_logging``."""
+    global _listener, _queue_handler
+
+    with _listener_lock:
+        if _listener is None:
+            return
+        logging.getLogger().removeHandler(_queue_handler)
+        _listener.stop()
+        _listener = None
+        _queue_handler = None
@@ -0,0 +1,253 @@
+import json
+import logging
+import math
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from solvis_sc3_modbus.client import RegisterReading
+from solvis_sc3_modbus.registers import ReadInputRegistersEnum
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for the ``wait`` query parameter of long-poll requests, in seconds.
+MAX_WAIT = 60.0
+
+GROUPS: Dict[str, List[str]] = {
+    'all': [register.name for register in ReadInputRegistersEnum],
+    'temps': [register.name for register in ReadInputRegistersEnum if register.name.startswith('TEMP_')],
+    'outputs': [register.name for register in ReadInputRegistersEnum
+                if register.name.startswith(('OUTPUT_', 'ANALOG_OUT_O'))],
+    'messages': [register.name for register in ReadInputRegistersEnum if register.name.startswith('MESSAGE')],
+}
+
+
+def _serialize_reading(reading: RegisterReading) -> bytes:
+    # The age is left out on purpose: it changes on every poll and would defeat the ETags.
+    payload = {
+        'value': reading.value,
+        'unit': reading.unit,
+        'status': reading.status.value,
+    }
+    if reading.error is not None:
+        payload['error'] = reading.error
+    return json.dumps(reading.name).encode() + b': ' + json.dumps(payload, default=str, ensure_ascii=False).encode()
+
+
+class SnapshotStore(object):
+    """
+    Hold the latest snapshot as pre-serialized JSON.
+
+    Every register tracks the version in which its value last changed. The version of a view (a group or an
+    arbitrary set of registers) is the highest version among its registers, so readers of a view are only
+    woken up and handed a new ETag when something they asked for changed.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        # Versions restart in every process; the epoch keeps ETags from an earlier run from matching
+        self.epoch = secrets.token_hex(4)
+        self._version = 0
+        # Serialized fragment and version per register; replaced as a whole so readers never see a mix
+        self._state: Tuple[Dict[str, bytes], Dict[str, int]] = ({}, {})
+        self._groups: Dict[str, Tuple[int, bytes]] = {}
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def publish(self, readings: Dict[str, RegisterReading]):
+        current_fragments, current_versions = self._state
+        fragments = {name: _serialize_reading(reading) for name, reading in readings.items()}
+        changed = [name for name, fragment in fragments.items() if current_fragments.get(name) != fragment]
+        if not changed:
+            return
+
+        with self._condition:
+            self._version += 1
+            versions = dict(current_versions)
+            versions.update((name, self._version) for name in changed)
+            self._state = ({**current_fragments, **fragments}, versions)
+            self._groups = {group: self._build(names) for group, names in GROUPS.items()}
+            self._condition.notify_all()
+        logger.debug("Published snapshot version %s with %s changed registers.", self._version, len(changed))
+
+    def group(self, group: str) -> Tuple[int, bytes]:
+        """Return the version and JSON body of a group. Raises KeyError for unknown groups."""
+        if group not in GROUPS:
+            raise KeyError(group)
+        return self._groups.get(group) or self._build(GROUPS[group])
+
+    def view(self, names: Iterable[str]) -> Tuple[int, bytes]:
+        """Return the version and JSON body of an arbitrary set of registers."""
+        return self._build(names)
+
+    def view_version(self, names: Iterable[str]) -> int:
+        return self._view_version(self._state[1], names)
+
+    def wait_for_change(self, names: List[str], since: int, timeout: float) -> bool:
+        """Block until the version of ``names`` differs from ``since``. Returns False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self.view_version(names) != since, timeout)
+
+    @staticmethod
+    def _view_version(versions: Dict[str, int], names: Iterable[str]) -> int:
+        return max((versions.get(name, 0) for name in names), default=0)
+
+    def _build(self, names: Iterable[str]) -> Tuple[int, bytes]:
+        names = list(names)
+        fragments, versions = self._state
+        version = self._view_version(versions, names)
+        body = b'{"version": %d, "registers": {' % version
+        body += b', '.join(fragments[name] for name in names if name in fragments)
+        return version, body + b'}}'
+
+
+class SnapshotRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serve snapshots from the server's ``SnapshotStore``.
+
+    ``GET /snapshot`` returns all registers, ``GET /snapshot/<group>`` one of ``GROUPS`` and
+    ``GET /snapshot?registers=TEMP_S1,TEMP_S2`` the listed registers. With ``If-None-Match`` set to the
+    current ETag the response is ``304 Not Modified``; adding ``?wait=<seconds>`` holds the request until
+    the view changes or the time is up.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    # Close idle keep-alive connections, leaving room for a long poll of up to MAX_WAIT seconds
+    timeout = MAX_WAIT + 10.0
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        store = self.server.store
+
+        parts = [part for part in url.path.split('/') if part]
+        if not parts or parts[0] != 'snapshot' or len(parts) > 2:
+            return self._send_error(404, "Not found")
+
+        group = None
+        if len(parts) == 2:
+            group = parts[1]
+            if group not in GROUPS:
+                return self._send_error(404, f"Unknown group '{group}'")
+            names = GROUPS[group]
+        elif 'registers' in query:
+            names = list(dict.fromkeys(name.strip().upper() for value in query['registers']
+                                       for name in value.split(',') if name.strip()))
+            unknown = [name for name in names if name not in ReadInputRegistersEnum.__members__]
+            if unknown:
+                return self._send_error(400, f"Unknown registers: {', '.join(unknown)}")
+        else:
+            group = 'all'
+            names = GROUPS[group]
+
+        since = self._if_none_match()
+        if since is not None and 'wait' in query:
+            try:
+                wait = float(query['wait'][0])
+            except ValueError:
+                wait = math.nan
+            if not math.isfinite(wait):
+                return self._send_error(400, "Invalid wait parameter")
+            wait = min(max(wait, 0.0), MAX_WAIT)
+            store.wait_for_change(names, since, wait)
+
+        if group is not None:
+            version, body = store.group(group)
+        else:
+            version, body = store.view(names)
+
+        if since is not None and since == version:
+            self.send_response(304)
+            self._send_common_headers(version)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self._send_common_headers(version)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - " + format, self.address_string(), *args)
+
+    def _if_none_match(self) -> Optional[int]:
+        """Return the version of the request's ETag, or None if it is missing or from another epoch."""
+        etag = self.headers.get('If-None-Match', '').strip()
+        if etag.startswith('W/'):
+            etag = etag[2:]
+        epoch, _, version = etag.strip('"').partition('-')
+        if epoch != self.server.store.epoch:
+            return None
+        try:
+            return int(version)
+        except ValueError:
+            return None
+
+    def _send_common_headers(self, version: int):
+        self.send_header('ETag', f'"{self.server.store.epoch}-{version}"')
+        self.send_header('Cache-Control', 'no-cache')
+
+    def _send_error(self, code: int, message: str):
+        body = json.dumps({'error': message}).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class SnapshotServer(ThreadingHTTPServer):
+    """
+    HTTP server that polls a ``SolvisSC3ModbusClient`` in the background and serves the latest snapshot.
+
+    All readers share one Modbus poll per interval; requests are answered from pre-serialized JSON.
+
+    Args:
+        solvis_client (SolvisSC3ModbusClient): Client used for polling.
+        host (str): Address to listen on.
+        port (int): Port to listen on.
+        interval (float): Seconds between the start of two polls.
+        deadline (float): Time budget of a single poll in seconds. Defaults to 80% of ``interval``.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, solvis_client, host='127.0.0.1', port=8080, interval=10.0, deadline=None):
+        super().__init__((host, port), SnapshotRequestHandler)
+        self.solvis_client = solvis_client
+        self.interval = interval
+        self.deadline = interval * 0.8 if deadline is None else deadline
+        self.store = SnapshotStore()
+        self._stop_polling = threading.Event()
+        self._poller = threading.Thread(target=self._poll_loop, name='SolvisSC3Poller', daemon=True)
+
+    def start_polling(self):
+        self._poller.start()
+
+    def serve_forever(self, poll_interval=0.5):
+        if not self._poller.is_alive():
+            self.start_polling()
+        super().serve_forever(poll_interval)
+
+    def server_close(self):
+        self._stop_polling.set()
+        super().server_close()
+
+    def poll_once(self):
+        try:
+            self.store.publish(self.solvis_client.get_snapshot(deadline=self.deadline))
+        except Exception as e:
+            logger.error("Exception while polling snapshot: %s", e)
+
+    def _poll_loop(self):
+        while not self._stop_polling.is_set():
+            started = time.monotonic()
+            self.poll_once()
+            self._stop_polling.wait(max(self.interval - (time.monotonic() - started), 0.0))
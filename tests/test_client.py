@@ -1,7 +1,11 @@
+import socket
 import unittest
 from unittest.mock import patch, MagicMock
 
-from solvis_sc3_modbus.client import SolvisSC3ModbusClient
+from pyModbusTCP.constants import MB_CONNECT_ERR, MB_EXCEPT_ERR
+from pyModbusTCP.server import ModbusServer
+
+from solvis_sc3_modbus.client import RegisterStatus, SolvisSC3ModbusClient, plan_blocks
 from solvis_sc3_modbus.registers import ReadInputRegistersEnum
 
 
@@ -59,6 +63,143 @@ class TestSolvisSC3ModbusClientMore(unittest.TestCase):
         with self.assertRaises(AttributeError):
             _, _ = modbus_client.get(register_name)
 
+    def test_plan_blocks(self):
+        self.assertEqual([(33024, 3), (33280, 1)], plan_blocks([33026, 33024, 33025, 33280, 33280]))
+        self.assertEqual([(3840, 6)], plan_blocks([3840, 3845], max_gap=4))
+        self.assertEqual([(0, 2), (2, 1)], plan_blocks([0, 1, 2], max_length=2))
+
+    def test_get_many_single_block(self):
+        self.mock_client_instance.read_holding_registers.return_value = [420, 430]
+
+        modbus_client = SolvisSC3ModbusClient(self.host, self.port, self.unit_id)
+        readings = modbus_client.get_many(['TEMP_S1', 'TEMP_S2'], deadline=1.0)
+
+        self.mock_client_instance.read_holding_registers.assert_called_once_with(33024, 2)
+        self.assertEqual(42.0, readings['TEMP_S1'].value)
+        self.assertEqual(43.0, readings['TEMP_S2'].value)
+        self.assertEqual("°C", readings['TEMP_S2'].unit)
+        self.assertEqual(RegisterStatus.FRESH, readings['TEMP_S2'].status)
+
+    def test_get_many_splits_failed_block(self):
+        def read(address, length):
+            return None if address <= 33025 < address + length else [420] * length
+        self.mock_client_instance.read_holding_registers.side_effect = read
+        self.mock_client_instance.last_error = MB_EXCEPT_ERR
+
+        modbus_client = SolvisSC3ModbusClient(self.host, self.port, self.unit_id)
+        readings = modbus_client.get_many(['TEMP_S1', 'TEMP_S2', 'TEMP_S3', 'TEMP_S4'], deadline=1.0)
+
+        self.assertEqual(RegisterStatus.FRESH, readings['TEMP_S1'].status)
+        self.assertEqual(RegisterStatus.MISSING, readings['TEMP_S2'].status)
+        self.assertIsNone(readings['TEMP_S2'].value)
+        self.assertEqual(RegisterStatus.FRESH, readings['TEMP_S3'].status)
+        self.assertEqual(RegisterStatus.FRESH, readings['TEMP_S4'].status)
+
+    def test_get_many_falls_back_to_cache(self):
+        self.mock_client_instance.read_holding_registers.return_value = [420]
+        modbus_client = SolvisSC3ModbusClient(self.host, self.port, self.unit_id)
+        modbus_client.get_many(['TEMP_S1'])
+
+        self.mock_client_instance.read_holding_registers.return_value = None
+        readings = modbus_client.get_many(['TEMP_S1'], deadline=1.0)
+
+        self.assertEqual(RegisterStatus.STALE, readings['TEMP_S1'].status)
+        self.assertEqual(42.0, readings['TEMP_S1'].value)
+        self.assertGreaterEqual(readings['TEMP_S1'].age, 0.0)
+
+    @patch('solvis_sc3_modbus.client.time.monotonic')
+    def test_get_many_stops_at_deadline(self, mock_monotonic):
+        mock_monotonic.return_value = 100.0
+
+        def read(address, length):
+            mock_monotonic.return_value += 1.0
+            return [420] * length
+        self.mock_client_instance.read_holding_registers.side_effect = read
+
+        modbus_client = SolvisSC3ModbusClient(self.host, self.port, self.unit_id)
+        readings = modbus_client.get_many(['TEMP_S1', 'OUTPUT_A1', 'MESSAGES_COUNT'], deadline=1.5)
+
+        self.assertEqual(2, self.mock_client_instance.read_holding_registers.call_count)
+        self.assertEqual(RegisterStatus.FRESH, readings['OUTPUT_A1'].status)
+        self.assertEqual(RegisterStatus.MISSING, readings['MESSAGES_COUNT'].status)
+
+    def test_get_many_sets_socket_timeout_without_reconnecting(self):
+        self.mock_client_instance.timeout = 30.0
+        self.mock_client_instance.read_holding_registers.side_effect = lambda address, length: [420] * length
+
+        modbus_client = SolvisSC3ModbusClient(self.host, self.port, self.unit_id)
+        readings = modbus_client.get_many(['TEMP_S1', 'MESSAGES_COUNT'], deadline=10000.0, min_attempt_time=0)
+
+        self.assertEqual(RegisterStatus.FRESH, readings['MESSAGES_COUNT'].status)
+        self.assertEqual(30.0, self.mock_client_instance.timeout)
+        self.mock_client_instance.open.assert_not_called()
+        settimeout = self.mock_client_instance._sock.settimeout
+        self.assertGreater(settimeout.call_args_list[0][0][0], 3600)
+        self.assertEqual(30.0, settimeout.call_args_list[-1][0][0])
+
+    def test_get_many_gives_up_when_device_is_down(self):
+        self.mock_client_instance.is_open = False
+        self.mock_client_instance.open.return_value = False
+        self.mock_client_instance.last_error = MB_CONNECT_ERR
+
+        modbus_client = SolvisSC3ModbusClient(self.host, self.port, self.unit_id)
+        readings = modbus_client.get_snapshot()
+
+        self.assertEqual(1, self.mock_client_instance.open.call_count)
+        self.assertTrue(all(reading.status == RegisterStatus.MISSING for reading in readings.values()))
+
+    @patch('solvis_sc3_modbus.client.socket.create_connection', side_effect=socket.timeout("timed out"))
+    def test_get_many_bounds_connect_by_deadline(self, mock_create_connection):
+        self.mock_client_instance.is_open = False
+
+        modbus_client = SolvisSC3ModbusClient(self.host, self.port, self.unit_id)
+        readings = modbus_client.get_snapshot(deadline=0.5)
+
+        mock_create_connection.assert_called_once()
+        self.assertLessEqual(mock_create_connection.call_args[1]['timeout'], 0.5)
+        self.mock_client_instance.open.assert_not_called()
+        self.assertEqual(RegisterStatus.MISSING, readings['TEMP_S1'].status)
+
+    def test_get_many_invalid_register(self):
+        modbus_client = SolvisSC3ModbusClient(self.host, self.port, self.unit_id)
+
+        with self.assertRaises(AttributeError):
+            modbus_client.get_many(['INVALID_REGISTER'])
+
+
+class TestSolvisSC3ModbusClientServer(unittest.TestCase):
+
+    def setUp(self):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            self.port = sock.getsockname()[1]
+        self.server = ModbusServer(host='127.0.0.1', port=self.port, no_block=True)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_get_snapshot_keeps_one_session(self):
+        modbus_client = SolvisSC3ModbusClient('127.0.0.1', self.port)
+
+        with patch('solvis_sc3_modbus.client.socket.create_connection',
+                   wraps=socket.create_connection) as mock_create_connection:
+            readings = modbus_client.get_many(['TEMP_S1', 'OUTPUT_A1', 'MESSAGES_COUNT'], deadline=5.0)
+
+        self.assertEqual(1, mock_create_connection.call_count)
+        self.assertEqual(RegisterStatus.FRESH, readings['MESSAGES_COUNT'].status)
+        modbus_client.client.close()
+
+    def test_get_snapshot_with_device_down_opens_once(self):
+        self.server.stop()
+        modbus_client = SolvisSC3ModbusClient('127.0.0.1', self.port)
+
+        with patch.object(modbus_client.client, 'open', wraps=modbus_client.client.open) as mock_open:
+            readings = modbus_client.get_snapshot()
+
+        self.assertEqual(1, mock_open.call_count)
+        self.assertEqual(RegisterStatus.MISSING, readings['TEMP_S1'].status)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,125 @@
+import io
+import json
+import logging
+import logging.handlers
+import unittest
+from unittest.mock import patch
+
+from solvis_sc3_modbus import log_config
+from solvis_sc3_modbus.log_config import JsonFormatter, RateLimitFilter, TextFormatter, setup_logging, stop_logging
+
+
+def _record(msg, *args, level=logging.WARNING, **extra):
+    record = logging.LogRecord("test", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestRateLimitFilter(unittest.TestCase):
+
+    @patch('solvis_sc3_modbus.log_config.time.monotonic')
+    def test_duplicates_suppressed_within_interval(self, mock_monotonic):
+        log_filter = RateLimitFilter(interval=60.0)
+
+        mock_monotonic.return_value = 0.0
+        self.assertTrue(log_filter.filter(_record("Failed register %s.", 33024)))
+        mock_monotonic.return_value = 10.0
+        self.assertFalse(log_filter.filter(_record("Failed register %s.", 33024)))
+        self.assertFalse(log_filter.filter(_record("Failed register %s.", 33024)))
+        # Different arguments are a different message
+        self.assertTrue(log_filter.filter(_record("Failed register %s.", 33025)))
+
+        mock_monotonic.return_value = 61.0
+        record = _record("Failed register %s.", 33024)
+        self.assertTrue(log_filter.filter(record))
+        self.assertEqual(2, record.suppressed)
+
+    @patch('solvis_sc3_modbus.log_config.time.monotonic')
+    def test_expired_entries_are_dropped(self, mock_monotonic):
+        log_filter = RateLimitFilter(interval=60.0)
+
+        mock_monotonic.return_value = 0.0
+        for error in range(100):
+            log_filter.filter(_record("Exception: %s", ValueError(error)))
+        mock_monotonic.return_value = 61.0
+        log_filter.filter(_record("Exception: %s", ValueError("new")))
+
+        self.assertEqual(1, len(log_filter._seen))
+
+    def test_records_below_level_pass(self):
+        log_filter = RateLimitFilter(interval=60.0)
+        for _ in range(3):
+            self.assertTrue(log_filter.filter(_record("Data %s", 1, level=logging.DEBUG)))
+
+
+class TestJsonFormatter(unittest.TestCase):
+
+    def test_format_includes_message_and_extra_fields(self):
+        output = JsonFormatter().format(_record("Failed register %s.", 33024, register=33024))
+        payload = json.loads(output)
+
+        self.assertEqual("Failed register 33024.", payload["message"])
+        self.assertEqual("WARNING", payload["level"])
+        self.assertEqual("test", payload["logger"])
+        self.assertEqual(33024, payload["register"])
+        self.assertNotIn("args", payload)
+
+    def test_text_format_mentions_suppressed(self):
+        output = TextFormatter('%(message)s').format(_record("Failed register %s.", 33024, suppressed=3))
+
+        self.assertEqual("Failed register 33024. (3 similar messages suppressed)", output)
+
+
+class TestSetupLogging(unittest.TestCase):
+
+    def setUp(self):
+        self.root = logging.getLogger()
+        self.root_level = self.root.level
+
+    def tearDown(self):
+        stop_logging()
+        self.root.setLevel(self.root_level)
+
+    def _queue_handlers(self):
+        return [handler for handler in self.root.handlers if isinstance(handler, logging.handlers.QueueHandler)]
+
+    def test_pipeline_installed_once_and_stopped(self):
+        logger = setup_logging("test_pipeline", json_output=True)
+        setup_logging("test_pipeline", json_output=True)
+        self.assertEqual(1, len(self._queue_handlers()))
+
+        stream = io.StringIO()
+        log_config._listener.handlers[0].setStream(stream)
+        logger.warning("Failed register %s.", 33024, extra={'register': 33024, 'suppressed': 2})
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("Exception while polling")
+        stop_logging()
+
+        self.assertEqual([], self._queue_handlers())
+        warning, exception = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual("Failed register 33024.", warning["message"])
+        self.assertEqual(33024, warning["register"])
+        self.assertEqual(2, warning["suppressed"])
+        self.assertEqual("Exception while polling", exception["message"])
+        self.assertIn("ValueError: boom", exception["exc_info"])
+
+    def test_text_output_keeps_traceback(self):
+        logger = setup_logging("test_pipeline", format='%(message)s')
+
+        stream = io.StringIO()
+        log_config._listener.handlers[0].setStream(stream)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("Exception while polling")
+        stop_logging()
+
+        output = stream.getvalue()
+        self.assertTrue(output.startswith("Exception while polling\nTraceback"))
+        self.assertIn("ValueError: boom", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+import json
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+from unittest.mock import MagicMock, patch
+
+from solvis_sc3_modbus.client import RegisterReading, RegisterStatus
+from solvis_sc3_modbus.server import MAX_WAIT, SnapshotRequestHandler, SnapshotServer, SnapshotStore
+
+
+def _readings(**values):
+    return {name: RegisterReading(name, value, "°C", RegisterStatus.FRESH) for name, value in values.items()}
+
+
+class TestSnapshotStore(unittest.TestCase):
+
+    def test_view_version_only_changes_with_its_registers(self):
+        store = SnapshotStore()
+        store.publish(_readings(TEMP_S1=42.0, TEMP_S2=43.0))
+        store.publish(_readings(TEMP_S1=42.0, TEMP_S2=44.0))
+
+        self.assertEqual(1, store.view(['TEMP_S1'])[0])
+        self.assertEqual(2, store.view(['TEMP_S1', 'TEMP_S2'])[0])
+        self.assertEqual(2, store.group('temps')[0])
+
+    def test_unchanged_readings_keep_version(self):
+        store = SnapshotStore()
+        store.publish(_readings(TEMP_S1=42.0))
+        store.publish(_readings(TEMP_S1=42.0))
+
+        self.assertEqual(1, store.version)
+
+    def test_view_body(self):
+        store = SnapshotStore()
+        store.publish(_readings(TEMP_S1=42.0, TEMP_S2=43.0))
+
+        version, body = store.view(['TEMP_S2'])
+        payload = json.loads(body)
+
+        self.assertEqual(version, payload['version'])
+        self.assertEqual({'TEMP_S2': {'value': 43.0, 'unit': '°C', 'status': 'fresh'}}, payload['registers'])
+
+    def test_wait_for_change(self):
+        store = SnapshotStore()
+        store.publish(_readings(TEMP_S1=42.0))
+
+        self.assertFalse(store.wait_for_change(['TEMP_S1'], 1, 0.01))
+        # A version the store never handed out doesn't hold the caller
+        self.assertTrue(store.wait_for_change(['TEMP_S1'], 99, 5.0))
+        threading.Timer(0.05, store.publish, [_readings(TEMP_S1=43.0)]).start()
+        self.assertTrue(store.wait_for_change(['TEMP_S1'], 1, 5.0))
+
+
+class TestSnapshotServer(unittest.TestCase):
+
+    def setUp(self):
+        self.solvis_client = MagicMock()
+        self.solvis_client.get_snapshot.return_value = _readings(TEMP_S1=42.0, MESSAGES_COUNT=0)
+        self.server = SnapshotServer(self.solvis_client, port=0, interval=60.0)
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05})
+        self.thread.start()
+        # serve_forever starts the poller, which publishes the first snapshot right away
+        self.server.store.wait_for_change(['TEMP_S1'], 0, 5.0)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def _get(self, path, etag=None):
+        request = urllib.request.Request(self.base_url + path)
+        if etag is not None:
+            request.add_header('If-None-Match', etag)
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, e.read()
+
+    def test_snapshot_and_conditional_request(self):
+        status, headers, body = self._get('/snapshot/temps')
+        self.assertEqual(200, status)
+        self.assertEqual({'TEMP_S1'}, set(json.loads(body)['registers']))
+
+        status, _, body = self._get('/snapshot/temps', etag=headers['ETag'])
+        self.assertEqual(304, status)
+        self.assertEqual(b'', body)
+
+        self.solvis_client.get_snapshot.assert_called_once()
+
+    def test_full_snapshot_is_prebuilt(self):
+        with patch.object(self.server.store, 'view') as mock_view:
+            status, _, body = self._get('/snapshot')
+
+        self.assertEqual(200, status)
+        self.assertEqual({'TEMP_S1', 'MESSAGES_COUNT'}, set(json.loads(body)['registers']))
+        mock_view.assert_not_called()
+
+    def test_register_subset(self):
+        status, _, body = self._get('/snapshot?registers=temp_s1,MESSAGES_COUNT,TEMP_S1')
+        self.assertEqual(200, status)
+        self.assertEqual(1, body.count(b'"TEMP_S1"'))
+        self.assertEqual(['TEMP_S1', 'MESSAGES_COUNT'], list(json.loads(body)['registers']))
+
+        status, _, _ = self._get('/snapshot?registers=INVALID_REGISTER')
+        self.assertEqual(400, status)
+
+    def test_etag_from_other_epoch_is_ignored(self):
+        _, headers, _ = self._get('/snapshot/temps')
+        version = headers['ETag'].strip('"').split('-')[1]
+
+        started = time.monotonic()
+        status, _, _ = self._get('/snapshot/temps?wait=5', etag=f'"00000000-{version}"')
+
+        self.assertEqual(200, status)
+        self.assertLess(time.monotonic() - started, 5.0)
+
+    def test_wait_must_be_finite(self):
+        _, headers, _ = self._get('/snapshot/temps')
+
+        for wait in ('nan', 'inf', 'soon'):
+            status, _, _ = self._get(f'/snapshot/temps?wait={wait}', etag=headers['ETag'])
+            self.assertEqual(400, status)
+
+    def test_idle_connections_time_out_after_long_polls(self):
+        self.assertIsNotNone(SnapshotRequestHandler.timeout)
+        self.assertGreater(SnapshotRequestHandler.timeout, MAX_WAIT)
+
+    def test_unknown_group(self):
+        status, _, _ = self._get('/snapshot/unknown')
+        self.assertEqual(404, status)
+
+    def test_long_poll_returns_on_change(self):
+        _, headers, _ = self._get('/snapshot/temps')
+        self.solvis_client.get_snapshot.return_value = _readings(TEMP_S1=43.0)
+        threading.Timer(0.05, self.server.poll_once).start()
+
+        started = time.monotonic()
+        status, new_headers, body = self._get('/snapshot/temps?wait=5', etag=headers['ETag'])
+
+        self.assertEqual(200, status)
+        self.assertLess(time.monotonic() - started, 5.0)
+        self.assertNotEqual(headers['ETag'], new_headers['ETag'])
+        self.assertEqual(43.0, json.loads(body)['registers']['TEMP_S1']['value'])
+
+
+if __name__ == '__main__':
+    unittest.main()